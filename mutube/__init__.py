@@ -1,5 +1,8 @@
-from .exceptions import NoTag, NoPlaylist, BadVideo
+from .exceptions import NoTag, NoPlaylist, BadVideo, FullPlaylist, EndOfReplay
+from .cache import ResponseCache
 from .scraper import Scraper
-from .playlister import Playlister, encode_tag, decode_tag, HttpError
+from .playlister import (Playlister, encode_tag, decode_tag, encode_shard,
+                         decode_shard, HttpError)
 from .resource_builder import ResourceBuilder
 from .mutuber import Mutuber
+from .sinks import Sink, PlaylistSink, FileSink, SQLiteSink
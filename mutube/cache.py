@@ -0,0 +1,96 @@
+""" cache
+
+Record raw 4chan API responses to disk, and replay them in place of the network.
+"""
+import gzip
+import json
+import time
+import zlib
+from .compat import HTTPError
+from .exceptions import EndOfReplay
+
+
+class ResponseCache():
+    """ Compressed, append-only store of raw JSON responses. """
+
+    def __init__(self, path, replay=False):
+        """ Open store at `path` for recording or replaying responses.
+
+        Args:
+            path ::: (str) path to gzip compressed store, created if necessary
+                     e.g. : 'mu-responses.jsonl.gz'
+            replay ::: (bool) `True` to serve responses from the store instead
+                       of the network, `False` to record network responses
+
+        Each response is appended as one JSON line, keyed by `url` and `time`
+        of retrieval. When replaying, each request for a catalog advances to
+        the next recorded scrape cycle, i.e. the responses recorded between
+        that catalog and the next recording of it.
+        """
+        self.path = path
+        self.replay = replay
+
+        # Replay state
+        self._records = None # stream of stored records
+        self._pending = None # first record of following cycle
+        self._cycle = {} # {url: record} for current cycle
+
+    def write(self, url, content):
+        """ Append raw response `content` (bytes) retrieved from `url`. """
+        record = {'url': url, 'time': time.time(),
+                  'content': content.decode('utf8')}
+        with gzip.open(self.path, 'ab') as f: # appends a new gzip member
+            f.write((json.dumps(record) + '\n').encode('utf8'))
+
+    def read(self, url):
+        """ Return raw response content (bytes) recorded for `url`.
+
+        Raises `EndOfReplay` when no further catalog is recorded, and
+        `HTTPError` (404) when `url` was not retrieved in the current cycle,
+        as for threads which had since closed.
+        """
+        if url.endswith('catalog.json'): # start of scrape cycle
+            self._next_cycle(url)
+
+        record = self._cycle.get(url)
+        if record is None:
+            raise HTTPError(url, 404, 'Not found in response cache', None,
+                            None)
+
+        return record['content'].encode('utf8')
+
+    def _next_cycle(self, catalog_url):
+        """ Load records from the next recording of `catalog_url` onwards. """
+        if self._records is None:
+            self._records = self._iter_records()
+
+        # Skip to next recorded catalog
+        record = self._pending
+        self._pending = None
+        while record is None or record['url'] != catalog_url:
+            record = next(self._records, None)
+            if record is None:
+                raise EndOfReplay("No more recorded responses for: {}".format(
+                    catalog_url))
+
+        # Collect responses until following catalog (later responses win)
+        self._cycle = {catalog_url: record}
+        for record in self._records:
+            if record['url'] == catalog_url:
+                self._pending = record
+                break
+            self._cycle[record['url']] = record
+
+    def _iter_records(self):
+        """ Yield every complete stored record, oldest first.
+
+        A record cut short (e.g. recorder killed mid-write) ends the store.
+        """
+        with gzip.open(self.path, 'rb') as f:
+            try:
+                for line in f:
+                    if not line.endswith(b'\n'): # incomplete record
+                        return
+                    yield json.loads(line.decode('utf8'))
+            except (EOFError, IOError, zlib.error): # truncated gzip member
+                return
@@ -11,3 +11,11 @@ class NoPlaylist(ValueError):
 class BadVideo(ValueError):
     """ When the YouTube video id does not lead to a real video """
     pass
+
+class FullPlaylist(ValueError):
+    """ When a playlist has reached its maximum number of items. """
+    pass
+
+class EndOfReplay(LookupError):
+    """ When a replayed response cache has no more recorded scrape cycles. """
+    pass
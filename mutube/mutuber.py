@@ -2,8 +2,9 @@
 Coordinate posting to YouTube playlist of videos scraped from 4chan.
 """
 
-from .exceptions import NoPlaylist, BadVideo
-from .playlister import Playlister, encode_tag, HttpError
+from .exceptions import NoPlaylist, BadVideo, FullPlaylist
+from .playlister import (Playlister, encode_tag, encode_shard, decode_shard,
+                         HttpError)
 from .scraper import Scraper
 import time
 
@@ -19,7 +20,8 @@ class Mutuber():
             client_json ::: (str) path to YouTube OAuth 2.0 client credentials
                 JSON file (see ...)
             current_only ::: (bool) `True` to search only currently active
-                playlist for duplicates, `False` to consider all specified
+                playlist (all shards) for duplicates, `False` to consider all
+                specified
         """
         # Initialise objects
         self.scraper = scraper
@@ -28,6 +30,10 @@ class Mutuber():
         # Initialise options 
         self.current_only = current_only
 
+        # Initialise current playlist state (see `get_current_playlist`)
+        self.tag = None
+        self.shards = []
+
         # Get existing id's
         if not self.current_only:
             self.existing_ids = self.get_all_existing_ids()
@@ -46,59 +52,112 @@ class Mutuber():
 
     def run_once(self, playlister_pause=1):
         """ Scrape videos from active thread and insert to current playlist."""
-        # Get current playlist
-        self.playlist = self.get_current_playlist()
-        
-        # Update set of existing ids
-        if self.current_only: # reset existing ids in current only mode
+        # Get current playlist and update set of existing ids
+        self.refresh_playlist()
+        if self.current_only:
             self.scraper.yt_ids = set() # flush out scrape history
-            self.existing_ids = self.playlister.get_posted_yt_ids(
-                    self.playlist) # only consider active playlist
         
         # Sync scraper with existing ids (to make scrape messages accurate)
         self.scraper.yt_ids.update(self.existing_ids)
         
         # Scrape new videos from active threads
-        self.scraper.scrape()
+        self.scraper.scrape(full=self.current_only) # include old links
         
         # Insert new videos
         self.insert_videos_to_playlist(playlister_pause)
 
+    def refresh_playlist(self):
+        """ Retrieve current playlist, updating set of existing ids. """
+        self.playlist = self.get_current_playlist()
+        if self.current_only: # reset existing ids in current only mode
+            self.existing_ids = self.get_current_ids() # only active playlist
+
+        return self.playlist
+
     def get_current_ids(self):
-        """ Return all video_ids posted in current playlist. """
-        playlist = self.playlister.get_current_playlist()
-        return set(self.playlister.get_posted_yt_ids(playlist))
+        """ Return all video_ids posted in every shard of current playlist. """
+        tag = self.get_current_tag()
+        if tag == self.tag: # include shards YouTube may not list yet
+            shards = self.shards
+        else:
+            try:
+                shards = self.playlister.get_shards(tag)
+            except NoPlaylist: # no playlist for current tag yet
+                shards = []
+
+        current_ids = set()
+        for playlist in shards:
+            current_ids.update(self.playlister.get_posted_yt_ids(playlist))
+
+        return current_ids
 
     def get_all_existing_ids(self):
         """ Return all video_ids posted in playlists tagged as specified. """
-        playlists = self.playlister.get_tagged_playlists()
+        tagged_shards = self.playlister.get_tagged_shards()
         existing_ids = set()
-        for playlist in playlists.values():
-            existing_ids.update(self.playlister.get_posted_yt_ids(playlist))
+        for shards in tagged_shards.values():
+            for playlist in shards:
+                existing_ids.update(self.playlister.get_posted_yt_ids(playlist))
         
         return existing_ids 
 
+    def get_current_tag(self):
+        """ Return playlist tag for the current time. """
+        return encode_tag(self.playlister.prefix, time.localtime(),
+                          self.playlister.time_format)
+
     def get_current_playlist(self):
-        """ Return current tagged playlist, creating one if necessary. """
+        """ Return current tagged playlist, creating one if necessary.
+
+        The latest shard of the current tag is returned, rolling over to a new
+        shard if it is already full.
+        """
         # Create current tag
-        tag = encode_tag(self.playlister.prefix, time.localtime(),
-                         self.playlister.time_format) 
+        self.tag = self.get_current_tag()
         try: # retrieve existing playlist
-            playlist = self.playlister.get_playlist(tag)
-            print("Retrieved playlist for tag: {}".format(tag))
+            self.shards = self.playlister.get_shards(self.tag)
+            self.playlist = self.shards[-1]
+            print("Retrieved playlist for tag: {}".format(self.tag))
+            if self.playlister.is_full(self.playlist):
+                self.roll_over_playlist()
         except NoPlaylist: # create new playlist
-            playlist = self.playlister.create_new_playlist(tag)
-            print("Created new playlist for tag: {}".format(tag))
+            self.playlist = self.playlister.create_new_playlist(self.tag)
+            self.shards = [self.playlist]
+            print("Created new playlist for tag: {}".format(self.tag))
     
-        return playlist
+        return self.playlist
+
+    def roll_over_playlist(self):
+        """ Create the next shard of current playlist and make it active. """
+        shard = decode_shard(self.playlist['snippet']['title']) + 1
+        title = encode_shard(self.tag, shard)
+        self.playlist = self.playlister.create_new_playlist(title)
+        self.shards.append(self.playlist)
+        print("Created new playlist shard: {}".format(title))
+
+        return self.playlist
+
+    def insert_videos_to_playlist(self, playlister_pause, yt_ids=None):
+        """ Insert all new videos to current playlist.
+
+        Args:
+            playlister_pause ::: (int) minutes to pause between insertions
+            yt_ids ::: (iterable, opt) video ids to insert, e.g. read back from
+                       an archive sink; defaults to all scraped video ids
+        """
+        if yt_ids is None:
+            yt_ids = self.scraper.yt_ids
 
-    def insert_videos_to_playlist(self, playlister_pause):
-        """ Insert all new videos to current playlist. """
         # Add scraped videos to playlist
-        for yt_id in self.scraper.yt_ids - self.existing_ids: # new videos only
+        for yt_id in set(yt_ids) - self.existing_ids: # new videos only
             try:
-                response = self.playlister.insert_vid_to_playlist(
-                        self.playlist, yt_id)
+                try:
+                    response = self.playlister.insert_vid_to_playlist(
+                            self.playlist, yt_id)
+                except FullPlaylist: # roll over to next shard and retry
+                    self.roll_over_playlist()
+                    response = self.playlister.insert_vid_to_playlist(
+                            self.playlist, yt_id)
                 self.existing_ids.add(yt_id)
                 print('Inserted: {}'.format(yt_id))
             except BadVideo: # skip dead links
@@ -1,15 +1,20 @@
 """ playlister """
 
-from .exceptions import NoTag, NoPlaylist, BadVideo
+from .exceptions import NoTag, NoPlaylist, BadVideo, FullPlaylist
 from apiclient.errors import HttpError
 import json
 import httplib2
+import re
 import time
 
+# Maximum number of items YouTube allows in a single playlist
+MAX_PLAYLIST_ITEMS = 5000
+
 class Playlister():
     """ Create YouTube playlists. """
 
-    def __init__(self, resource, prefix, time_format):
+    def __init__(self, resource, prefix, time_format,
+                 max_items=MAX_PLAYLIST_ITEMS):
         """
         Initialise YouTube client and specify tag format for playlist titles.
 
@@ -20,10 +25,14 @@ class Playlister():
                             see http://strftime.org/	
             resource ::: YouTube `apiclient.discovery.Resource` instance,
 	    		 authorised for read/write requests
+            max_items ::: (int) number of items at which a playlist is full,
+                          and further videos roll over to a new shard
+                          (see `encode_shard` documentation)
 	"""	
         self.youtube = resource 
         self.prefix = prefix
         self.time_format = time_format
+        self.max_items = max_items
     
     def _extract_tag_from_title(self, title):
         """ Return tag found in `title` matching specified format."""
@@ -48,28 +57,41 @@ class Playlister():
 
         return valid
 
-    def get_tagged_playlists(self):
-        """ Return {tag: response} for appropriately tagged playlists. """
+    def get_tagged_shards(self):
+        """ Return {tag: [response, ...]} for appropriately tagged playlists.
+
+        Each list holds every shard of the tag, ordered by shard number.
+        """
 
-        # Fetch list of playlists
+        # Fetch list of playlists, including item counts
         all_playlists = []
         request = self.youtube.playlists().list(
-                part='snippet', mine=True, maxResults=50)
+                part='snippet,contentDetails', mine=True, maxResults=50)
         while request:
             response=request.execute()
             all_playlists.extend(response['items'])
             request = self.youtube.playlists().list_next(request, response)
 
         # Filter playlists
-        tagged_playlists = {}
+        tagged_shards = {}
         for playlist in all_playlists:
             try: # store playlist
                 tag = self._extract_tag_from_title(playlist['snippet']['title'])
-                tagged_playlists[tag] = playlist # ! duplicates get shadowed
+                tagged_shards.setdefault(tag, []).append(playlist)
             except NoTag:
                 pass
 
-        return tagged_playlists
+        # Order shards
+        for shards in tagged_shards.values():
+            shards.sort(key=lambda p: decode_shard(p['snippet']['title']))
+
+        return tagged_shards
+
+    def get_tagged_playlists(self):
+        """ Return {tag: response} for the latest shard of each tag. """
+
+        return dict((tag, shards[-1])
+                    for tag, shards in self.get_tagged_shards().items())
 
     def create_new_playlist(self, title):
         """ Create empty public playlist with `title`, returning response. """
@@ -82,18 +104,38 @@ class Playlister():
         
         return request.execute()
 
+    def get_shards(self, tag):
+        """ Return all playlists whose title starts with `tag`.
+
+        Returns:
+            shards ::: (list) playlist responses, ordered by shard number
+        """
+
+        shards = self.get_tagged_shards().get(tag)
+        if not shards:
+            raise NoPlaylist("No playlist found matching tag: {}".format(tag))
+
+        return shards
+
     def get_playlist(self, tag):
-        """ Return any playlist whose title starts with `tag`.
+        """ Return the latest shard of the playlist whose title starts with
+        `tag`.
         
-        Note: if multiple playlists match `tag`, an arbitrary one is returned.
+        Note: if multiple playlists share a shard number, an arbitrary one is
+        returned.
         """
 
-        tagged_playlists = self.get_tagged_playlists()
-        playlist = tagged_playlists.get(tag)
-        if playlist is None:
-            raise NoPlaylist("No playlist found matching tag: {}".format(tag))
+        return self.get_shards(tag)[-1]
 
-        return playlist
+    def get_item_count(self, playlist):
+        """ Return the number of items known to be in `playlist`. """
+
+        return playlist.get('contentDetails', {}).get('itemCount', 0)
+
+    def is_full(self, playlist):
+        """ Return True if `playlist` can accept no more items. """
+
+        return self.get_item_count(playlist) >= self.max_items
 
     def get_posted_yt_ids(self, playlist):
         """ Return all YouTube video ids in a playlist.
@@ -125,7 +167,14 @@ class Playlister():
             playlist ::: (dict) containing `id` key for youtube playlist id
                          i.e. the response from youtube api playlist request
             yt_id ::: (str) id of a YouTube video
+
+        The item count of `playlist` is updated in place on success.
+        Raises `FullPlaylist` when `playlist` is full, so that the caller can
+        roll over to a new shard.
         """
+        if self.is_full(playlist):
+            raise FullPlaylist('playlist is full: {}'.format(playlist['id']))
+
         # Build insert request
         request = self.youtube.playlistItems().insert(
             part='snippet', body={'snippet':{
@@ -135,13 +184,22 @@ class Playlister():
 
         # Return a valid response, or raise an error
         try: 
-            return request.execute()
+            response = request.execute()
         except HttpError as err:
             if err.resp.status == 404: # "video not found" error
                 raise BadVideo('video does not exist: {}'.format(yt_id))
+            elif (err.resp.status == 403 and # count was stale, playlist full
+                  b'playlistContainsMaximumNumOfVideos' in err.content):
+                raise FullPlaylist('playlist is full: {}'.format(
+                    playlist['id']))
             else:
                 raise err
 
+        # Track item count
+        details = playlist.setdefault('contentDetails', {})
+        details['itemCount'] = details.get('itemCount', 0) + 1
+        return response
+
 # Helper functions
 def encode_tag(prefix, time_tuple, time_format):
     """ Create a [prefix:time] playlist tag using specified time formatting.
@@ -188,3 +246,28 @@ def decode_tag(tag, time_format):
     
     return prefix, time_tuple
 
+def encode_shard(tag, shard):
+    """ Create a playlist title for the numbered `shard` of `tag`.
+
+    The first shard is titled by the bare tag; later shards, created when a
+    playlist fills up, are suffixed with their number.
+
+    Args:
+        tag ::: (str) playlist tag, see `encode_tag` documentation
+        shard ::: (int) shard number, counting from 1
+    Returns:
+        title ::: (str) playlist title
+
+    Example:
+        >>> encode_shard(tag='[\\m/:Nov 2016]', shard=2)
+        '[\\m/:Nov 2016] part 2'
+    """
+    if shard == 1:
+        return tag
+    return '{} part {}'.format(tag, shard)
+
+def decode_shard(title):
+    """ Return the shard number of a playlist title (see `encode_shard`). """
+    match = re.match(r'\s*part (\d+)', title.split(']', 1)[-1])
+    return int(match.group(1)) if match else 1
+
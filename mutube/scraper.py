@@ -5,6 +5,7 @@ Scrape YouTube links from 4chan threads.
 import json
 import time
 from .compat import HTTPError, URLError, parse_qs, urlopen, urlparse
+from .exceptions import EndOfReplay
 from bs4 import BeautifulSoup
 
 
@@ -12,7 +13,7 @@ class Scraper():
     """ Scraper for YouTube links from 4chan threads. """
 
     def __init__(self, board, matching_func=None, bad_posters=None,
-                 **matching_kwargs):
+                 cache=None, sinks=None, **matching_kwargs):
         """ Set up scraper for `board` with specified scraping criteria.
     
     Args:
@@ -26,6 +27,10 @@ class Scraper():
                          below)
             bad_posters (opt) ::: list of posting names (sans trip) to ignore
                             e.g. : ['Tinytrip', 'ennui']
+            cache (opt) ::: `ResponseCache` instance to record raw responses
+                            to, or replay them from (see `replay`)
+            sinks (opt) ::: list of `Sink` instances, each written (and
+                            flushed) the new video ids found by every scrape
             **matching_kwargs ::: keyword args to pass to matching_func, e.g:
             subjects ::: (iterable) str thread subjects, passed to `is_in_list`
                          function to identify threads to scrape by simple (case
@@ -41,6 +46,8 @@ class Scraper():
         else:
             self.matching_func = matching_func
         self.matching_kwargs = matching_kwargs
+        self.cache = cache
+        self.sinks = [] if sinks is None else sinks
         
         # Initialise set and list attributes
         self.thread_nums = set()
@@ -48,26 +55,40 @@ class Scraper():
         self.yt_ids = set()
         self.bad_posters = [] if bad_posters is None else bad_posters
 
-    def scrape(self, verbose=True):
+        # Initialise catalog diff state
+        self.snapshot = {} # {thread_num: (subject, replies)} of last catalog
+        self.catalog_diff = {'new': set(), 'dropped': set(), 'changed': set()}
+        self.matched_threads = set() # catalog threads meeting criteria
+        self.scraped_replies = {} # {thread_num: replies} when last scraped
+        self._subject_matches = {} # {subject: bool} matching results
+
+    def scrape(self, verbose=True, full=False):
         """ Scrape YouTube links from up-to-date catalog with current settings.
         
         Args:
             verbose ::: bool whether to describe scraping (default True)
+            full ::: bool whether to re-scrape threads with no new replies
+                     (default False)
         """
-        # Update thread numbers from up-to-date catalog
+        # Update thread numbers from changes to up-to-date catalog
         self._get_catalog()
-        thread_nums = self._filter_catalog()
+        self._diff_catalog()
+        thread_nums = self._filter_catalog() - self.closed_threads
         new_threads = thread_nums.difference(self.thread_nums)
         self.thread_nums.update(thread_nums)
         
         # Scrape all threads for links
-        yt_ids, closed_threads = self._scrape_catalog()
+        yt_ids, closed_threads, scraped_replies = self._scrape_catalog(full)
         new_ids = yt_ids.difference(self.yt_ids)
         self.yt_ids.update(new_ids)
+        self.scraped_replies.update(scraped_replies) # once links are kept
         
         # Remove closed threads
         self.thread_nums -= closed_threads
         self.closed_threads.update(closed_threads)
+        self.scraped_replies = dict((num, replies) for num, replies
+                                    in self.scraped_replies.items()
+                                    if num in self.thread_nums)
 
         if verbose:
             print("Scraped {} new links from {} threads".format(
@@ -75,6 +96,33 @@ class Scraper():
                     "({} new threads added, {} closed threads removed)".format(
                         len(new_threads), len(closed_threads)))
 
+        # Output new videos to every sink, raising first error afterwards
+        error = None
+        for sink in self.sinks:
+            try:
+                sink.write(new_ids)
+                sink.flush()
+            except Exception as e: # failed ids stay buffered in sink
+                if error is None:
+                    error = e
+        if error is not None:
+            raise error
+
+    def replay(self, verbose=True):
+        """ Re-run `scrape` for every scrape cycle recorded in `self.cache`.
+
+        Args:
+            verbose ::: bool whether to describe scraping (default True)
+        """
+        if self.cache is None or not self.cache.replay:
+            raise ValueError("Replaying requires a cache in replay mode")
+
+        try:
+            while True:
+                self.scrape(verbose)
+        except EndOfReplay: # all recorded cycles scraped
+            pass
+
     def _get_catalog(self):                                                   
         """ Retrieve an up-to-date JSON catalog of the 4chan board. """
         catalog_url = '/'.join(['https://a.4cdn.org', self.board,
@@ -106,33 +154,53 @@ class Scraper():
         return thread 
 
     def _get_json_data(self, url):
-        """ Return the json data located at `url`. """
-        response = urlopen(url)
-        content = response.read()
+        """ Return the json data located at `url`, via cache if attached. """
+        if self.cache is not None and self.cache.replay: # no network access
+            content = self.cache.read(url)
+        else:
+            response = urlopen(url)
+            content = response.read()
+            if self.cache is not None: # record raw response
+                self.cache.write(url, content)
         data = json.loads(content.decode("utf8"))
         return data
 
-    def _scrape_catalog(self):
+    def _scrape_catalog(self, full=False):
         """ Scrape (optionally filtered) board catalog for YouTube links 
+
+        Unless `full`, threads whose catalog reply count is unchanged since
+        they were last scraped are skipped; threads absent from the catalog
+        are always scraped.
         
         Returns:
             yt_ids ::: set of video ids of scraped YouTube links
-            closed_threads ::: set of numbers of closed/archived/404 threads
+            closed_threads ::: set of numbers of closed threads, or 404
+                               threads no longer in the catalog
+            scraped_replies ::: {thread_num: replies} catalog reply counts of
+                                threads scraped successfully
         """
         # Scrape links from each comment in each thread
         yt_ids = set()
         closed_threads = set()
+        scraped_replies = {}
         for thread_num in self.thread_nums:
+            replies = self.snapshot.get(thread_num, (None, None))[1]
+            if (not full and replies is not None and
+                    self.scraped_replies.get(thread_num) == replies):
+                continue # no new posts
             try:
                 thread = self._get_thread(thread_num) # retrieve thread JSON
                 yt_ids.update(self._scrape_thread(thread)) # scrape thread
+                if replies is not None:
+                    scraped_replies[thread_num] = replies
                 # Flag closed threads
                 if thread['posts'][0].get('closed', False):
                     closed_threads.add(thread_num)
-            except(HTTPError): # flag inaccesible threads
-                closed_threads.add(thread_num)
+            except(HTTPError) as e: # flag deleted threads, retry others
+                if e.code == 404 and thread_num not in self.snapshot:
+                    closed_threads.add(thread_num)
         
-        return yt_ids, closed_threads
+        return yt_ids, closed_threads, scraped_replies
 
     def _scrape_thread(self, thread):
         """ Return any YouTube links scraped from posts in `thread`. """
@@ -148,20 +216,55 @@ class Scraper():
                 pass
         return yt_ids
 
+    def _diff_catalog(self):
+        """ Compare catalog with snapshot of previous catalog.
+
+        Returns:
+            catalog_diff ::: dict of sets of thread numbers, keyed by:
+                             'new' : threads not in previous catalog
+                             'dropped' : threads no longer in catalog
+                             'changed' : threads whose reply count changed
+        """
+        # Snapshot catalog
+        snapshot = {}
+        for page in self.catalog:
+            for thread in page['threads']:
+                snapshot[int(thread['no'])] = (thread.get('sub', ''),
+                                               thread.get('replies', 0))
+
+        # Compare with previous snapshot
+        current, previous = set(snapshot), set(self.snapshot)
+        self.catalog_diff = {
+                'new': current - previous,
+                'dropped': previous - current,
+                'changed': set(no for no in current & previous
+                               if snapshot[no][1] != self.snapshot[no][1])}
+        self.snapshot = snapshot
+
+        return self.catalog_diff
+
     def _filter_catalog(self):
         """ Return thread numbers in catalog which meet matching criteria.
+
+        Only threads new to the catalog are matched, and each distinct subject
+        is matched once while it remains in the catalog.
         """ 
-        thread_nums = set()
+        # Forget threads and subjects no longer in catalog
+        self.matched_threads -= self.catalog_diff['dropped']
+        subjects = set(subject for subject, _ in self.snapshot.values())
+        for subject in set(self._subject_matches) - subjects:
+            del self._subject_matches[subject]
 
-        # Trawl through catalog for threads
-        for page in self.catalog:                                               
-            for thread in page['threads']:
-                thread_no = int(thread['no'])
-                subject = thread.get('sub', '')
-                # Filter catalogs by subject
-                if self.matching_func(subject, **self.matching_kwargs):
-                    thread_nums.add(thread_no)
-        return thread_nums
+        # Filter new threads by subject
+        for thread_no in self.catalog_diff['new']:
+            subject = self.snapshot[thread_no][0]
+            if subject not in self._subject_matches:
+                self._subject_matches[subject] = self.matching_func(
+                        subject, **self.matching_kwargs)
+            if self._subject_matches[subject]:
+                self.matched_threads.add(thread_no)
+
+        return set(self.matched_threads)
 
     def _scrape_posts(self, thread):
         """ Return any YouTube video ids from an iterable of JSON posts. """
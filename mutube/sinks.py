@@ -0,0 +1,153 @@
+""" sinks
+
+Buffered outputs for scraped YouTube video ids.
+"""
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+
+YT_LINK = 'https://www.youtube.com/watch?v={}'
+
+
+class Sink():
+    """ Base sink, buffering video ids and writing them in batches. """
+
+    def __init__(self, batch_size=100):
+        """
+        Args:
+            batch_size ::: (int) number of video ids to buffer before writing
+        """
+        self.batch_size = batch_size
+        self.buffer = []
+
+    def write(self, yt_ids):
+        """ Buffer video ids, writing full batches.
+
+        Video ids are only removed from the buffer once their batch has been
+        written, so a failed batch is retried by the next write or flush.
+        """
+        self.buffer.extend(yt_ids)
+        while len(self.buffer) >= self.batch_size:
+            self._write_batch(self.buffer[:self.batch_size])
+            del self.buffer[:self.batch_size]
+
+    def flush(self):
+        """ Write any buffered video ids. """
+        if self.buffer:
+            self._write_batch(list(self.buffer))
+            del self.buffer[:]
+
+    def close(self):
+        """ Flush buffer and release resources. """
+        self.flush()
+
+    def _write_batch(self, batch):
+        """ Write a list of video ids; implemented by subclasses. """
+        raise NotImplementedError
+
+
+class PlaylistSink(Sink):
+    """ Insert video ids into the current YouTube playlist of a mutuber. """
+
+    def __init__(self, mutuber, playlister_pause=1, batch_size=50):
+        """
+        Args:
+            mutuber ::: `Mutuber` instance coordinating playlist insertion
+            playlister_pause ::: (int) minutes to pause between insertions
+            batch_size ::: (int) number of video ids to buffer before writing
+        """
+        Sink.__init__(self, batch_size)
+        self.mutuber = mutuber
+        self.playlister_pause = playlister_pause
+
+    def _write_batch(self, batch):
+        self.mutuber.refresh_playlist() # current tag may have changed
+        self.mutuber.insert_videos_to_playlist(self.playlister_pause, batch)
+
+
+class FileSink(Sink):
+    """ Append video ids to a JSON lines or CSV file. """
+
+    FIELDS = ['yt_id', 'link', 'time']
+
+    def __init__(self, path, fmt='jsonl', batch_size=100):
+        """
+        Args:
+            path ::: (str) path to file, created if necessary
+            fmt ::: (str) file format, either 'jsonl' or 'csv'
+            batch_size ::: (int) number of video ids to buffer before writing
+        """
+        if fmt not in ('jsonl', 'csv'):
+            raise ValueError("Unknown file format: {}".format(fmt))
+        Sink.__init__(self, batch_size)
+        self.path = path
+        self.fmt = fmt
+
+    def _open(self, mode):
+        """ Open file in text mode `mode`, suitably for `csv` if required. """
+        if self.fmt == 'csv' and sys.version_info[0] < 3: # python 2.x
+            return open(self.path, mode + 'b')
+        elif self.fmt == 'csv':
+            return open(self.path, mode, newline='')
+        return open(self.path, mode)
+
+    def _write_batch(self, batch):
+        now = time.time()
+        rows = [dict(yt_id=yt_id, link=YT_LINK.format(yt_id), time=now)
+                for yt_id in batch]
+        new_file = not os.path.exists(self.path) or not os.path.getsize(
+                self.path)
+        with self._open('a') as f:
+            if self.fmt == 'jsonl':
+                f.writelines(json.dumps(row) + '\n' for row in rows)
+            else:
+                writer = csv.DictWriter(f, fieldnames=self.FIELDS)
+                if new_file:
+                    writer.writeheader()
+                writer.writerows(rows)
+
+    def read(self):
+        """ Return list of all video ids written to file, oldest first. """
+        with self._open('r') as f:
+            if self.fmt == 'jsonl':
+                return [json.loads(line)['yt_id'] for line in f if line.strip()]
+            else:
+                return [row['yt_id'] for row in csv.DictReader(f)]
+
+
+class SQLiteSink(Sink):
+    """ Store unique video ids in a local SQLite database. """
+
+    def __init__(self, path, batch_size=100):
+        """
+        Args:
+            path ::: (str) path to database file, created if necessary
+            batch_size ::: (int) number of video ids to buffer before writing
+        """
+        Sink.__init__(self, batch_size)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS videos "
+                    "(yt_id TEXT PRIMARY KEY, time REAL)")
+
+    def _write_batch(self, batch):
+        now = time.time()
+        with self.connection: # commit batch as one transaction
+            self.connection.executemany(
+                    "INSERT OR IGNORE INTO videos VALUES (?, ?)",
+                    [(yt_id, now) for yt_id in batch])
+
+    def read(self):
+        """ Return list of all stored video ids, oldest first. """
+        cursor = self.connection.execute(
+                "SELECT yt_id FROM videos ORDER BY time, rowid")
+        return [row[0] for row in cursor]
+
+    def close(self):
+        Sink.close(self)
+        self.connection.close()